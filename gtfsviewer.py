@@ -1,4 +1,8 @@
+import io
 import os
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import json
 from datetime import datetime, timedelta
@@ -6,6 +10,192 @@ import uuid
 import zipfile
 import shutil
 
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+    pacsv = None
+
+# GTFS identifier columns are parsed as strings so lookups do not depend on
+# dtype inference (route_id may look numeric in one file and not in another)
+_GTFS_ID_DTYPES = {
+    'route_id': str,
+    'trip_id': str,
+    'service_id': str,
+    'stop_id': str,
+    'shape_id': str,
+    'agency_id': str,
+}
+
+# Explicit column types for the pyarrow CSV reader: same string ids as above,
+# plus explicit numeric types for shape points. Coordinates stay float64 —
+# float32 noise would both shift points (~1e-6 deg) and bloat the JSON with
+# long round-trip digits
+_ARROW_COLUMN_TYPES = {
+    'route_id': pa.string(),
+    'trip_id': pa.string(),
+    'service_id': pa.string(),
+    'stop_id': pa.string(),
+    'shape_id': pa.string(),
+    'agency_id': pa.string(),
+    'shape_pt_lat': pa.float64(),
+    'shape_pt_lon': pa.float64(),
+    'shape_pt_sequence': pa.int32(),
+    # Calendar columns: YYYYMMDD dates fit int32, flags fit int8, so the
+    # per-request date comparisons need no casting
+    'start_date': pa.int32(),
+    'end_date': pa.int32(),
+    'date': pa.int32(),
+    'exception_type': pa.int8(),
+    'monday': pa.int8(),
+    'tuesday': pa.int8(),
+    'wednesday': pa.int8(),
+    'thursday': pa.int8(),
+    'friday': pa.int8(),
+    'saturday': pa.int8(),
+    'sunday': pa.int8(),
+} if pa is not None else {}
+
+@functools.lru_cache(maxsize=32)
+def _load_csv(path, mtime, columns=None):
+    """Load a GTFS CSV file, cached in-process on (path, mtime, columns)
+
+    On first full parse a feather sidecar is written next to the CSV so
+    later cold starts skip CSV parsing entirely; the sidecar is ignored
+    when the CSV has been modified since it was written.
+
+    Args:
+        path (str): Path to the CSV file
+        mtime (float): Modification time of the file (cache key)
+        columns (tuple, optional): Columns to load; columns missing from
+            the file are silently skipped, others are not parsed at all
+
+    Returns:
+        DataFrame: Parsed file contents (callers must not mutate in place)
+    """
+    if columns is not None:
+        # Intersect with the actual header so optional GTFS columns
+        # (e.g. shape_id in trips.txt) don't break the read
+        header = pd.read_csv(path, nrows=0).columns
+        columns = [c for c in columns if c in header]
+
+    feather_path = path + '.feather'
+    if os.path.exists(feather_path) and os.path.getmtime(feather_path) >= mtime:
+        try:
+            return pd.read_feather(feather_path, columns=columns)
+        except Exception:
+            pass
+    if pacsv is not None:
+        # pyarrow's multi-threaded CSV reader avoids the dtype-inference
+        # re-scan and is several times faster than pandas on stop_times/shapes
+        convert_options = pacsv.ConvertOptions(column_types=_ARROW_COLUMN_TYPES)
+        if columns is not None:
+            convert_options.include_columns = columns
+        table = pacsv.read_csv(path, convert_options=convert_options)
+        df = table.to_pandas(self_destruct=True)
+    else:
+        df = pd.read_csv(path, dtype=_GTFS_ID_DTYPES, engine='c', usecols=columns)
+    if columns is None:
+        # Only full reads produce a sidecar; a partial one would silently
+        # drop columns for later callers
+        try:
+            df.to_feather(feather_path)
+        except Exception:
+            # Sidecar is an optimization only; fall through if it can't be written
+            pass
+    return df
+
+def _read_gtfs(path, columns=None):
+    """Read a GTFS file through the mtime-keyed cache"""
+    return _load_csv(path, os.path.getmtime(path), columns)
+
+@functools.lru_cache(maxsize=32)
+def _load_indexed(path, mtime, index_col, columns=None):
+    """Load a GTFS file indexed and sorted by a key column
+
+    Indexing turns the per-request filters (trips by route_id, shapes by
+    shape_id, stop times by trip_id) into sorted-index lookups instead of
+    full-column scans. The key column is kept (drop=False) so callers that
+    expect it as a regular column keep working.
+
+    Args:
+        path (str): Path to the GTFS file
+        mtime (float): Modification time of the file (cache key)
+        index_col (str): Column to index by
+
+    Returns:
+        DataFrame: File contents indexed by index_col (do not mutate)
+    """
+    df = _load_csv(path, mtime, columns)
+    if index_col not in df.columns:
+        return df
+    df = df.set_index(index_col, drop=False).sort_index()
+    # Clear the index name so merges on the kept column stay unambiguous
+    df.index.name = None
+    return df
+
+def _read_gtfs_indexed(path, index_col, columns=None):
+    """Read a GTFS file through the cache, indexed by a key column"""
+    return _load_indexed(path, os.path.getmtime(path), index_col, columns)
+
+_REQUIRED_GTFS_FILES = frozenset(['routes.txt', 'stops.txt', 'trips.txt', 'stop_times.txt'])
+
+_GTFS_FILES = ('routes.txt', 'trips.txt', 'stop_times.txt', 'stops.txt',
+               'shapes.txt', 'calendar.txt', 'calendar_dates.txt', 'agency.txt')
+
+def _preparse_folder(folder_path):
+    """Parse every GTFS file in a folder once, warming the columnar sidecars
+
+    _load_csv writes a typed feather sidecar on first parse, so running it
+    for all files right after upload moves the one-off CSV cost out of the
+    request path entirely; queries then deserialize the columnar sidecars.
+    """
+    for name in _GTFS_FILES:
+        path = os.path.join(folder_path, name)
+        if os.path.exists(path):
+            try:
+                _read_gtfs(path)
+            except Exception:
+                logger.debug("Could not pre-parse %s", path, exc_info=True)
+
+@functools.lru_cache(maxsize=256)
+def _is_valid_gtfs_cached(folder_path, mtime_ns):
+    """Check a folder for the required GTFS files, cached per folder mtime
+
+    A single directory listing replaces one exists() stat per required
+    file, and repeated folder polls hit the cache instead of the
+    filesystem.
+    """
+    try:
+        present = set(os.listdir(folder_path))
+    except OSError:
+        return False
+
+    missing_files = _REQUIRED_GTFS_FILES - present
+    if missing_files:
+        logger.debug("Missing required GTFS files in %s: %s",
+                     folder_path, ', '.join(sorted(missing_files)))
+        return False
+
+    logger.debug("All required GTFS files found in %s", folder_path)
+    return True
+
+@functools.lru_cache(maxsize=256)
+def _get_agency_name_cached(agency_file, mtime_ns):
+    """Read the agency name from agency.txt, cached per file mtime"""
+    try:
+        # Only the first row of one column is needed; the except also
+        # covers feeds whose agency.txt omits the agency_name column
+        agency_df = pd.read_csv(agency_file, usecols=['agency_name'], nrows=1, engine='c')
+        if not agency_df.empty:
+            return agency_df.iloc[0]['agency_name']
+    except:
+        pass
+    return None
+
 class GTFSViewer:
     """Class to handle GTFS data processing and analysis"""
     
@@ -25,38 +215,39 @@ class GTFSViewer:
             list: List of folder paths containing GTFS data
         """
         folders = []
-        
+
         # Check if base directory exists
         if not os.path.exists(self.base_dir):
-            print(f"Base directory does not exist: {self.base_dir}")
+            logger.debug("Base directory does not exist: %s", self.base_dir)
             return folders
-        
-        print(f"Scanning base directory: {self.base_dir}")
-        
-        # List all UUID folders
-        for uuid_dir in os.listdir(self.base_dir):
-            uuid_path = os.path.join(self.base_dir, uuid_dir)
-            if os.path.isdir(uuid_path):
-                print(f"Found UUID directory: {uuid_path}")
-                # For each UUID folder, list timestamp folders
-                for timestamp_dir in os.listdir(uuid_path):
-                    timestamp_path = os.path.join(uuid_path, timestamp_dir)
-                    if os.path.isdir(timestamp_path):
-                        print(f"Checking timestamp directory: {timestamp_path}")
-                        # Check if this contains GTFS files
-                        if self._is_valid_gtfs(timestamp_path):
-                            print(f"Valid GTFS found in: {timestamp_path}")
-                            agency_name = self._get_agency_name(timestamp_path)
-                            print(f"Agency name: {agency_name}")
-                            folders.append({
-                                'path': timestamp_path,
-                                'id': f"{uuid_dir}/{timestamp_dir}",
-                                'name': agency_name or timestamp_dir
-                            })
-                        else:
-                            print(f"Invalid GTFS data in: {timestamp_path}")
-        
-        print(f"Found {len(folders)} valid GTFS folders")
+
+        logger.debug("Scanning base directory: %s", self.base_dir)
+
+        # scandir reuses the stat info from the directory read, so each
+        # is_dir() check avoids a separate stat syscall per entry
+        for uuid_entry in os.scandir(self.base_dir):
+            if not uuid_entry.is_dir():
+                continue
+            logger.debug("Found UUID directory: %s", uuid_entry.path)
+            # For each UUID folder, list timestamp folders
+            for timestamp_entry in os.scandir(uuid_entry.path):
+                if not timestamp_entry.is_dir():
+                    continue
+                timestamp_path = timestamp_entry.path
+                logger.debug("Checking timestamp directory: %s", timestamp_path)
+                # Check if this contains GTFS files
+                if self._is_valid_gtfs(timestamp_path):
+                    agency_name = self._get_agency_name(timestamp_path)
+                    logger.debug("Valid GTFS found in %s (agency: %s)", timestamp_path, agency_name)
+                    folders.append({
+                        'path': timestamp_path,
+                        'id': f"{uuid_entry.name}/{timestamp_entry.name}",
+                        'name': agency_name or timestamp_entry.name
+                    })
+                else:
+                    logger.debug("Invalid GTFS data in: %s", timestamp_path)
+
+        logger.debug("Found %d valid GTFS folders", len(folders))
         return folders
     
     def _is_valid_gtfs(self, folder_path):
@@ -68,20 +259,11 @@ class GTFSViewer:
         Returns:
             bool: True if folder contains required GTFS files
         """
-        required_files = ['routes.txt', 'stops.txt', 'trips.txt', 'stop_times.txt']
-        missing_files = []
-        
-        for file in required_files:
-            file_path = os.path.join(folder_path, file)
-            if not os.path.exists(file_path):
-                missing_files.append(file)
-        
-        if missing_files:
-            print(f"Missing required GTFS files in {folder_path}: {', '.join(missing_files)}")
+        try:
+            mtime_ns = os.stat(folder_path).st_mtime_ns
+        except OSError:
             return False
-        
-        print(f"All required GTFS files found in {folder_path}")
-        return True
+        return _is_valid_gtfs_cached(folder_path, mtime_ns)
     
     def _get_agency_name(self, folder_path):
         """Get agency name from agency.txt if available
@@ -94,12 +276,7 @@ class GTFSViewer:
         """
         agency_file = os.path.join(folder_path, 'agency.txt')
         if os.path.exists(agency_file):
-            try:
-                agency_df = pd.read_csv(agency_file)
-                if 'agency_name' in agency_df.columns and not agency_df.empty:
-                    return agency_df.iloc[0]['agency_name']
-            except:
-                pass
+            return _get_agency_name_cached(agency_file, os.stat(agency_file).st_mtime_ns)
         return None
     
     def get_routes(self, folder_id):
@@ -112,57 +289,50 @@ class GTFSViewer:
             list: List of routes with their details
         """
         try:
-            print(f"Getting routes for folder_id: {folder_id}")
+            logger.debug("Getting routes for folder_id: %s", folder_id)
             try:
                 uuid_dir, timestamp_dir = folder_id.split('/')
             except ValueError as e:
-                print(f"Invalid folder_id format: {folder_id}, error: {e}")
+                logger.debug("Invalid folder_id format: %s, error: %s", folder_id, e)
                 return []
                 
             folder_path = os.path.join(self.base_dir, uuid_dir, timestamp_dir)
-            print(f"Looking for routes in: {folder_path}")
+            logger.debug("Looking for routes in: %s", folder_path)
             
             if not os.path.exists(folder_path):
-                print(f"Folder path does not exist: {folder_path}")
+                logger.debug("Folder path does not exist: %s", folder_path)
                 return []
             
             routes_file = os.path.join(folder_path, 'routes.txt')
             if not os.path.exists(routes_file):
-                print(f"Routes file does not exist: {routes_file}")
+                logger.debug("Routes file does not exist: %s", routes_file)
                 return []
                 
-            print(f"Reading routes from: {routes_file}")
-            routes_df = pd.read_csv(routes_file)
-            print(f"Found {len(routes_df)} routes")
+            logger.debug("Reading routes from: %s", routes_file)
+            routes_df = _read_gtfs(routes_file)
+            logger.debug("Found %s routes", len(routes_df))
             
             # Optional: Join with agency info if available
             agency_file = os.path.join(folder_path, 'agency.txt')
             if os.path.exists(agency_file):
-                print(f"Reading agency info from: {agency_file}")
-                agency_df = pd.read_csv(agency_file)
+                logger.debug("Reading agency info from: %s", agency_file)
+                agency_df = _read_gtfs(agency_file)
                 if 'agency_id' in routes_df.columns and 'agency_id' in agency_df.columns:
-                    print("Merging routes with agency info")
+                    logger.debug("Merging routes with agency info")
                     routes_df = pd.merge(routes_df, agency_df, on='agency_id', how='left')
             
             # Handle NaN values to avoid JSON serialization issues
             routes_df = routes_df.fillna('')
-            
-            # Convert to list of dictionaries, ensuring proper serialization
-            routes = []
-            for _, row in routes_df.iterrows():
-                route_dict = {}
-                for col in routes_df.columns:
-                    # Convert to string to avoid issues with NaN and int/float serialization
-                    route_dict[col] = str(row[col]) if not pd.isna(row[col]) else ""
-                routes.append(route_dict)
-            
-            print(f"Returning {len(routes)} routes")
+
+            # Convert to list of dictionaries in one vectorized pass, casting
+            # everything to string to avoid int/float serialization issues
+            routes = routes_df.astype(str).to_dict('records')
+
+            logger.debug("Returning %s routes", len(routes))
             return routes
             
-        except Exception as e:
-            print(f"Error getting routes: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error getting routes")
             return []
     
     def get_route_details(self, folder_id, route_id, date_time_str):
@@ -177,24 +347,24 @@ class GTFSViewer:
             dict: Route details including shape and stops
         """
         try:
-            print(f"\nProcessing route details request - Folder: {folder_id}, Route: {route_id}, DateTime: {date_time_str}")
+            logger.debug("Processing route details request - Folder: %s, Route: %s, DateTime: %s", folder_id, route_id, date_time_str)
             
             uuid_dir, timestamp_dir = folder_id.split('/')
             folder_path = os.path.join(self.base_dir, uuid_dir, timestamp_dir)
-            print(f"Looking in folder path: {folder_path}")
+            logger.debug("Looking in folder path: %s", folder_path)
             
             if not os.path.exists(folder_path):
-                print(f"Error: Folder path does not exist: {folder_path}")
+                logger.debug("Error: Folder path does not exist: %s", folder_path)
                 return {"error": "Folder not found"}
             
             # Parse datetime
             date_time = datetime.strptime(date_time_str, "%Y-%m-%d %H:%M")
             service_date = date_time.strftime("%Y%m%d")
             time_str = date_time.strftime("%H:%M:%S")
-            print(f"Parsed date: {service_date}, time: {time_str}")
+            logger.debug("Parsed date: %s, time: %s", service_date, time_str)
             
             # Load required files
-            print("Loading GTFS files...")
+            logger.debug("Loading GTFS files...")
             routes_file = os.path.join(folder_path, 'routes.txt')
             trips_file = os.path.join(folder_path, 'trips.txt')
             stop_times_file = os.path.join(folder_path, 'stop_times.txt')
@@ -203,46 +373,48 @@ class GTFSViewer:
             # Check if files exist
             for file_path in [routes_file, trips_file, stop_times_file, stops_file]:
                 if not os.path.exists(file_path):
-                    print(f"Error: Required file missing: {file_path}")
+                    logger.debug("Error: Required file missing: %s", file_path)
                     return {"error": f"Required GTFS file missing: {os.path.basename(file_path)}"}
             
             # Load dataframes
-            routes_df = pd.read_csv(routes_file)
-            trips_df = pd.read_csv(trips_file)
-            stop_times_df = pd.read_csv(stop_times_file)
-            stops_df = pd.read_csv(stops_file)
-            
-            print(f"Loaded {len(routes_df)} routes, {len(trips_df)} trips, {len(stop_times_df)} stop times, {len(stops_df)} stops")
-            
-            # Filter to the specific route
-            # Convert route_id to both string and integer forms for comparison
-            # since GTFS data might have inconsistent types between files
-            print(f"Filtering trips for route_id: {route_id}")
-            
+            # Parsing releases the GIL, so loading the files concurrently
+            # costs roughly the largest parse rather than the sum of all four
+            # Only the columns each lookup actually touches are loaded;
+            # routes.txt is read whole since its row is returned verbatim
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                routes_future = executor.submit(_read_gtfs_indexed, routes_file, 'route_id')
+                trips_future = executor.submit(
+                    _read_gtfs_indexed, trips_file, 'route_id',
+                    ('route_id', 'trip_id', 'service_id', 'shape_id'))
+                stop_times_future = executor.submit(
+                    _read_gtfs_indexed, stop_times_file, 'trip_id',
+                    ('trip_id', 'stop_id'))
+                stops_future = executor.submit(
+                    _read_gtfs, stops_file,
+                    ('stop_id', 'stop_name', 'stop_lat', 'stop_lon'))
+                routes_df = routes_future.result()
+                trips_df = trips_future.result()
+                stop_times_df = stop_times_future.result()
+                stops_df = stops_future.result()
+            
+            logger.debug("Loaded %s routes, %s trips, %s stop times, %s stops", len(routes_df), len(trips_df), len(stop_times_df), len(stops_df))
+            
+            # Filter to the specific route via the sorted route_id index
+            # instead of scanning the whole column
+            logger.debug("Filtering trips for route_id: %s", route_id)
+
             try:
-                route_id_int = int(route_id)
-                # Use == comparisons separately and combine with logical OR
-                trips_route_id_match = trips_df['route_id'] == route_id
-                trips_route_id_int_match = trips_df['route_id'] == route_id_int
-                trips_route_id_str_match = trips_df['route_id'].astype(str) == route_id
-                
-                # Combine the conditions
-                route_trips = trips_df[trips_route_id_match | trips_route_id_int_match | trips_route_id_str_match]
-            except (ValueError, TypeError):
-                # If route_id can't be converted to int, just use string comparison
-                trips_route_id_match = trips_df['route_id'] == route_id
-                trips_route_id_str_match = trips_df['route_id'].astype(str) == route_id
-                
-                # Combine the conditions
-                route_trips = trips_df[trips_route_id_match | trips_route_id_str_match]
-                
-            print(f"Found {len(route_trips)} trips for route {route_id}")
+                route_trips = trips_df.loc[[str(route_id)]]
+            except KeyError:
+                route_trips = trips_df.iloc[0:0]
+
+            logger.debug("Found %s trips for route %s", len(route_trips), route_id)
             
             if len(route_trips) == 0:
-                print(f"No trips found for route ID: {route_id}")
+                logger.debug("No trips found for route ID: %s", route_id)
                 # Log available route IDs for debugging
                 available_route_ids = trips_df['route_id'].unique()
-                print(f"Available route IDs in trips.txt: {available_route_ids}")
+                logger.debug("Available route IDs in trips.txt: %s", available_route_ids)
                 return {"error": f"No trips found for route ID: {route_id}. This may be due to a data mismatch between routes.txt and trips.txt, or the route is not active on the selected date."}
             
             # Get service IDs active on the selected date
@@ -252,51 +424,50 @@ class GTFSViewer:
             
             # Check calendar.txt for service periods
             if os.path.exists(calendar_file):
-                print(f"Loading calendar data from: {calendar_file}")
-                calendar_df = pd.read_csv(calendar_file)
+                logger.debug("Loading calendar data from: %s", calendar_file)
+                calendar_df = _read_gtfs(calendar_file)
                 
-                # Filter for services where the current date is within the range
                 service_date_int = int(service_date)
-                
-                # Filter for services where the current date is within the range
-                start_date_le = calendar_df['start_date'].astype(int) <= service_date_int
-                end_date_ge = calendar_df['end_date'].astype(int) >= service_date_int
-                valid_services = calendar_df[start_date_le & end_date_ge]
-                
-                # Further filter by day of week
+
+                # Determine the day-of-week column for the requested date
                 weekday = date_time.weekday()
                 # In GTFS, Monday is 1 in Python it's 0, etc.
                 weekday_mapping = {
-                    0: 'monday', 1: 'tuesday', 2: 'wednesday', 
+                    0: 'monday', 1: 'tuesday', 2: 'wednesday',
                     3: 'thursday', 4: 'friday', 5: 'saturday', 6: 'sunday'
                 }
                 weekday_column = weekday_mapping[weekday]
-                
+
+                # Dates are parsed as integers at load time, so the range and
+                # weekday checks combine into a single boolean mask
+                valid_mask = ((calendar_df['start_date'] <= service_date_int) &
+                              (calendar_df['end_date'] >= service_date_int))
                 if weekday_column in calendar_df.columns:
-                    valid_services = valid_services[valid_services[weekday_column] == 1]
-                    
+                    valid_mask &= calendar_df[weekday_column] == 1
+                valid_services = calendar_df[valid_mask]
+
+
                 if not valid_services.empty:
                     service_ids = valid_services['service_id'].unique()
-                    print(f"Found {len(service_ids)} valid service IDs for date {service_date}: {service_ids}")
+                    logger.debug("Found %s valid service IDs for date %s: %s", len(service_ids), service_date, service_ids)
             
             # Check for specific overrides in calendar_dates.txt
             if os.path.exists(calendar_dates_file):
-                print(f"Loading calendar dates from: {calendar_dates_file}")
-                calendar_dates_df = pd.read_csv(calendar_dates_file)
+                logger.debug("Loading calendar dates from: %s", calendar_dates_file)
+                calendar_dates_df = _read_gtfs(calendar_dates_file)
                 
                 # Check for service exceptions for the specific date
                 if 'date' in calendar_dates_df.columns and 'exception_type' in calendar_dates_df.columns:
-                    # Convert service date for proper comparison
+                    # Dates are already integers, so no per-request casting
                     service_date_int = int(service_date)
-                    date_equals = calendar_dates_df['date'].astype(int) == service_date_int
-                    date_exceptions = calendar_dates_df[date_equals]
+                    date_exceptions = calendar_dates_df[calendar_dates_df['date'] == service_date_int]
                     
                     if not date_exceptions.empty:
                         # exception_type 1 = service added, 2 = service removed
                         added_services = date_exceptions[date_exceptions['exception_type'] == 1]['service_id'].unique()
                         removed_services = date_exceptions[date_exceptions['exception_type'] == 2]['service_id'].unique()
                         
-                        print(f"Service exceptions for {service_date}: Added {len(added_services)}, Removed {len(removed_services)}")
+                        logger.debug("Service exceptions for %s: Added %s, Removed %s", service_date, len(added_services), len(removed_services))
                         
                         # Update service_ids based on exceptions
                         if service_ids is not None:
@@ -310,20 +481,24 @@ class GTFSViewer:
             
             # If no service information found, don't filter by service_id
             if service_ids is not None and len(service_ids) > 0:
-                print(f"Filtering trips by service IDs: {service_ids}")
+                logger.debug("Filtering trips by service IDs: %s", service_ids)
                 route_trips = route_trips[route_trips['service_id'].isin(service_ids)]
-                print(f"After service filtering: Found {len(route_trips)} trips for route {route_id}")
+                logger.debug("After service filtering: Found %s trips for route %s", len(route_trips), route_id)
                 
                 if len(route_trips) == 0:
-                    print(f"No trips found for route ID {route_id} on service date {service_date}")
+                    logger.debug("No trips found for route ID %s on service date %s", route_id, service_date)
                     return {"error": f"No trips scheduled for route ID {route_id} on {date_time_str}"}
             else:
-                print("No valid service IDs found for the selected date, not filtering by service")
+                logger.debug("No valid service IDs found for the selected date, not filtering by service")
             
             # Find trip that is active at the given time
             # This is also simplified - actual implementation would be more complex
-            trip_stops = pd.merge(route_trips, stop_times_df, on='trip_id')
-            print(f"Found {len(trip_stops)} stop times across all trips for this route")
+            # stop_times is indexed and sorted by trip_id, so the route's few
+            # trips resolve to index slices instead of a scan of the full
+            # table; only the stop_id column is materialized
+            trip_ids = stop_times_df.index.intersection(route_trips['trip_id'].unique())
+            route_stop_times = stop_times_df.loc[trip_ids, 'stop_id']
+            logger.debug("Found %s stop times across all trips for this route", len(route_stop_times))
             
             # Get shape data if available
             shape_points = []
@@ -331,53 +506,59 @@ class GTFSViewer:
                 # If we have a shapes.txt file, use it to get route shapes
                 shapes_file = os.path.join(folder_path, 'shapes.txt')
                 if os.path.exists(shapes_file):
-                    print(f"Loading shapes from: {shapes_file}")
-                    shapes_df = pd.read_csv(shapes_file)
-                    print(f"Loaded {len(shapes_df)} shape points")
+                    logger.debug("Loading shapes from: %s", shapes_file)
+                    shapes_df = _read_gtfs_indexed(
+                        shapes_file, 'shape_id',
+                        ('shape_id', 'shape_pt_lat', 'shape_pt_lon', 'shape_pt_sequence'))
+                    logger.debug("Loaded %s shape points", len(shapes_df))
                     
                     # Get first trip's shape_id
                     if not route_trips.empty and 'shape_id' in route_trips.columns:
                         first_shape_id = route_trips.iloc[0]['shape_id']
-                        print(f"Using shape_id: {first_shape_id}")
-                        
-                        shape_df = shapes_df[shapes_df['shape_id'] == first_shape_id].sort_values('shape_pt_sequence')
-                        print(f"Found {len(shape_df)} shape points for this shape_id")
+                        logger.debug("Using shape_id: %s", first_shape_id)
                         
-                        for _, row in shape_df.iterrows():
-                            shape_points.append({
-                                'lat': float(row['shape_pt_lat']),
-                                'lng': float(row['shape_pt_lon'])
-                            })
+                        try:
+                            shape_df = shapes_df.loc[[first_shape_id]].sort_values('shape_pt_sequence')
+                        except KeyError:
+                            shape_df = shapes_df.iloc[0:0]
+                        logger.debug("Found %s shape points for this shape_id", len(shape_df))
+
+                        # Pull both coordinate columns out as numpy arrays and
+                        # build the point dicts from plain floats; tolist()
+                        # converts the whole array in C in one call
+                        lats = shape_df['shape_pt_lat'].to_numpy(dtype='float64').tolist()
+                        lngs = shape_df['shape_pt_lon'].to_numpy(dtype='float64').tolist()
+                        shape_points = [{'lat': lat, 'lng': lng} for lat, lng in zip(lats, lngs)]
                 else:
-                    print(f"No shapes.txt file found in: {folder_path}")
+                    logger.debug("No shapes.txt file found in: %s", folder_path)
             else:
-                print("No shape_id column in trips data")
+                logger.debug("No shape_id column in trips data")
             
-            print(f"Created {len(shape_points)} shape points for the route")
+            logger.debug("Created %s shape points for the route", len(shape_points))
             
             # Get stops for this route
-            stop_ids = trip_stops['stop_id'].unique()
-            print(f"Found {len(stop_ids)} unique stop IDs for the route")
+            stop_ids = route_stop_times.unique()
+            logger.debug("Found %s unique stop IDs for the route", len(stop_ids))
             
             route_stops = stops_df[stops_df['stop_id'].isin(stop_ids)]
-            print(f"Found {len(route_stops)} stops matching the stop IDs")
-            
-            stops_list = []
-            for _, stop in route_stops.iterrows():
-                stops_list.append({
-                    'id': str(stop['stop_id']),
-                    'name': str(stop['stop_name']) if not pd.isna(stop['stop_name']) else "",
-                    'lat': float(stop['stop_lat']),
-                    'lng': float(stop['stop_lon'])
-                })
-            
-            # Get route details
+            logger.debug("Found %s stops matching the stop IDs", len(route_stops))
+            
+            stops_list = route_stops.assign(
+                id=route_stops['stop_id'].astype(str),
+                name=route_stops['stop_name'].fillna('').astype(str),
+                lat=route_stops['stop_lat'].astype(float),
+                lng=route_stops['stop_lon'].astype(float)
+            )[['id', 'name', 'lat', 'lng']].to_dict('records')
+            
+            # Get route details with an indexed lookup instead of a column scan
             route_info = {}
-            if not routes_df[routes_df['route_id'] == route_id].empty:
-                route_row = routes_df[routes_df['route_id'] == route_id].iloc[0]
-                for col in routes_df.columns:
-                    # Convert to string to avoid issues with NaN and int/float serialization
-                    route_info[col] = str(route_row[col]) if not pd.isna(route_row[col]) else ""
+            try:
+                route_row = routes_df.loc[[str(route_id)]].iloc[0]
+                # Convert to string to avoid issues with NaN and int/float serialization
+                route_info = {col: str(val) if not pd.isna(val) else ""
+                              for col, val in route_row.items()}
+            except KeyError:
+                pass
             
             result = {
                 'route': route_info,
@@ -385,13 +566,11 @@ class GTFSViewer:
                 'stops': stops_list
             }
             
-            print(f"Returning route details: {len(result['shape'])} shape points, {len(result['stops'])} stops")
+            logger.debug("Returning route details: %s shape points, %s stops", len(result['shape']), len(result['stops']))
             return result
             
         except Exception as e:
-            print(f"Error getting route details: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error getting route details")
             return {"error": str(e)}
     
     def upload_gtfs(self, file_obj):
@@ -407,42 +586,42 @@ class GTFSViewer:
             # Create UUID folder
             folder_uuid = str(uuid.uuid4())
             uuid_dir = os.path.join(self.base_dir, folder_uuid)
-            print(f"Creating UUID directory: {uuid_dir}")
+            logger.debug("Creating UUID directory: %s", uuid_dir)
             os.makedirs(uuid_dir, exist_ok=True)
             
             # Create timestamp subfolder
             timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
             extract_dir = os.path.join(uuid_dir, timestamp)
-            print(f"Creating timestamp directory: {extract_dir}")
+            logger.debug("Creating timestamp directory: %s", extract_dir)
             os.makedirs(extract_dir, exist_ok=True)
             
-            # Save the uploaded file
-            zip_path = os.path.join(uuid_dir, 'gtfs.zip')
-            print(f"Saving uploaded file to: {zip_path}")
-            with open(zip_path, 'wb') as f:
-                f.write(file_obj.read())
-            
-            # Extract the zip file
-            print(f"Extracting zip file to: {extract_dir}")
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
-            
-            # Clean up the zip file
-            print(f"Removing temporary zip file: {zip_path}")
-            os.remove(zip_path)
-            
-            # Verify GTFS data
-            if not self._is_valid_gtfs(extract_dir):
-                print(f"Extracted data is not valid GTFS: {extract_dir}")
-                # Don't delete the folder, keep it for inspection
-                # But return an error
-                raise ValueError("Uploaded file does not contain valid GTFS data")
-            
+            # Extract directly from the uploaded stream: FileStorage streams
+            # are seekable, so no temporary zip copy on disk is needed
+            logger.debug("Extracting uploaded zip to: %s", extract_dir)
+            stream = getattr(file_obj, 'stream', file_obj)
+            if not (hasattr(stream, 'seekable') and stream.seekable()):
+                # Non-seekable source: buffer once in memory, still no disk round-trip
+                stream = io.BytesIO(stream.read())
+            with zipfile.ZipFile(stream) as zip_ref:
+                # Reject invalid archives before anything is written to disk,
+                # and only extract top-level .txt members so an archive full
+                # of unrelated files can't flood the data directory
+                names = set(zip_ref.namelist())
+                if not _REQUIRED_GTFS_FILES.issubset(names):
+                    missing = ', '.join(sorted(_REQUIRED_GTFS_FILES - names))
+                    logger.debug("Uploaded zip is missing required GTFS files: %s", missing)
+                    raise ValueError("Uploaded file does not contain valid GTFS data")
+                gtfs_members = [n for n in names if n.endswith('.txt') and '/' not in n]
+                zip_ref.extractall(extract_dir, members=gtfs_members)
+
+            # Convert the feed to columnar sidecars once, at upload time,
+            # so no query ever pays for CSV parsing
+            logger.debug("Pre-parsing GTFS files in: %s", extract_dir)
+            _preparse_folder(extract_dir)
+
             folder_id = f"{folder_uuid}/{timestamp}"
-            print(f"GTFS data successfully extracted to folder ID: {folder_id}")
+            logger.debug("GTFS data successfully extracted to folder ID: %s", folder_id)
             return folder_id
-        except Exception as e:
-            print(f"Error in upload_gtfs: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error in upload_gtfs")
             raise